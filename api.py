@@ -15,9 +15,8 @@ from pydantic import BaseModel
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from ocr_engine import extract_contract_data
-from extract_info import get_llm_extraction, parse_ocr_text
+from extract_info import extract_document_fields, EXTRACTION_VERSION
 from db import DatabaseManager
-from vin_service import lookup_vin
 from chat_service import chat_with_document
 
 # Configure logging
@@ -64,21 +63,13 @@ async def process_document(file: UploadFile = File(...)):
         if not ocr_result:
              raise HTTPException(status_code=500, detail="OCR failed to extract data")
         
-        # 2. Parse Text
-        text_content = parse_ocr_text(ocr_result)
-        
-        # 3. LLM Extraction
+        # 2. LLM Extraction + VIN Lookup
         logging.info("Starting LLM Extraction...")
-        extracted_info = get_llm_extraction(text_content)
-
-        # 4. VIN Lookup
-        if "VIN" in extracted_info and extracted_info["VIN"] != "Not Found":
-            vin_details = lookup_vin(extracted_info["VIN"])
-            if vin_details:
-                extracted_info["vin_details"] = vin_details
+        extracted_info = extract_document_fields(ocr_result)
         
-        # 5. Save to DB
-        doc_id = db.insert_document(file.filename, ocr_result, extracted_info)
+        # 3. Save to DB (failed extractions stay unversioned so reextract.py retries them)
+        extraction_version = None if "Error" in extracted_info else EXTRACTION_VERSION
+        doc_id = db.insert_document(file.filename, ocr_result, extracted_info, extraction_version)
         
         return {
             "id": doc_id,
@@ -19,9 +19,24 @@ class DatabaseManager:
                     filename TEXT NOT NULL,
                     upload_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
                     ocr_data JSON,
-                    extracted_data JSON
+                    extracted_data JSON,
+                    extraction_version TEXT
                 )
             ''')
+            # Databases created before extraction versioning lack the column
+            cursor.execute('PRAGMA table_info(documents)')
+            columns = [row[1] for row in cursor.fetchall()]
+            if 'extraction_version' not in columns:
+                cursor.execute('ALTER TABLE documents ADD COLUMN extraction_version TEXT')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS reextraction_checkpoints (
+                    target_version TEXT PRIMARY KEY,
+                    last_doc_id INTEGER NOT NULL,
+                    updated_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            # WAL lets API reads proceed while a re-extraction job is writing
+            cursor.execute('PRAGMA journal_mode=WAL')
             conn.commit()
             logging.info(f"Database initialized at {self.db_path}")
         except Exception as e:
@@ -30,15 +45,15 @@ class DatabaseManager:
             if conn:
                 conn.close()
 
-    def insert_document(self, filename, ocr_data, extracted_data):
+    def insert_document(self, filename, ocr_data, extracted_data, extraction_version=None):
         """Insert a new document record."""
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             cursor.execute('''
-                INSERT INTO documents (filename, ocr_data, extracted_data)
-                VALUES (?, ?, ?)
-            ''', (filename, json.dumps(ocr_data), json.dumps(extracted_data)))
+                INSERT INTO documents (filename, ocr_data, extracted_data, extraction_version)
+                VALUES (?, ?, ?, ?)
+            ''', (filename, json.dumps(ocr_data), json.dumps(extracted_data), extraction_version))
             doc_id = cursor.lastrowid
             conn.commit()
             return doc_id
@@ -54,7 +69,10 @@ class DatabaseManager:
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM documents WHERE id = ?', (doc_id,))
+            cursor.execute('''
+                SELECT id, filename, upload_timestamp, ocr_data, extracted_data, extraction_version
+                FROM documents WHERE id = ?
+            ''', (doc_id,))
             row = cursor.fetchone()
             
             if row:
@@ -63,7 +81,8 @@ class DatabaseManager:
                     "filename": row[1],
                     "upload_timestamp": row[2],
                     "ocr_data": json.loads(row[3]) if row[3] else None,
-                    "extracted_data": json.loads(row[4]) if row[4] else None
+                    "extracted_data": json.loads(row[4]) if row[4] else None,
+                    "extraction_version": row[5]
                 }
             return None
         except Exception as e:
@@ -109,6 +128,8 @@ class DatabaseManager:
             count = cursor.fetchone()[0]
             if count == 0:
                 cursor.execute("DELETE FROM sqlite_sequence WHERE name='documents'")
+                # Ids restart at 1, so saved re-extraction positions no longer apply
+                cursor.execute('DELETE FROM reextraction_checkpoints')
                 
             conn.commit()
             return rows_deleted > 0
@@ -118,3 +139,110 @@ class DatabaseManager:
         finally:
             if conn:
                 conn.close()
+
+    def get_stale_documents(self, extraction_version, after_id=0, limit=100):
+        """
+        Retrieve the next chunk of documents whose extraction is not at the given version.
+        Pages by id so rows that fail to re-extract are not fetched again in the same pass.
+        """
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, ocr_data FROM documents
+                WHERE id > ? AND (extraction_version IS NULL OR extraction_version != ?)
+                ORDER BY id
+                LIMIT ?
+            ''', (after_id, extraction_version, limit))
+            rows = cursor.fetchall()
+
+            documents = []
+            for row in rows:
+                documents.append({
+                    "id": row[0],
+                    "ocr_data": json.loads(row[1]) if row[1] else None
+                })
+            return documents
+        except Exception as e:
+            logging.error(f"Failed to list stale documents: {e}")
+            return []
+        finally:
+            if conn:
+                conn.close()
+
+    def count_stale_documents(self, extraction_version, after_id=0):
+        """Count documents after the given id whose extraction is not at the given version."""
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) FROM documents
+                WHERE id > ? AND (extraction_version IS NULL OR extraction_version != ?)
+            ''', (after_id, extraction_version))
+            return cursor.fetchone()[0]
+        except Exception as e:
+            logging.error(f"Failed to count stale documents: {e}")
+            return 0
+        finally:
+            if conn:
+                conn.close()
+
+    def update_extraction(self, doc_id, extracted_data, extraction_version):
+        """Replace the extracted data of a document and record the version that produced it."""
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE documents SET extracted_data = ?, extraction_version = ?
+                WHERE id = ?
+            ''', (json.dumps(extracted_data), extraction_version, doc_id))
+            rows_updated = cursor.rowcount
+            conn.commit()
+            return rows_updated > 0
+        except Exception as e:
+            logging.error(f"Failed to update extraction for document {doc_id}: {e}")
+            return False
+        finally:
+            if conn:
+                conn.close()
+
+    def get_reextraction_checkpoint(self, target_version):
+        """Return the last document id processed by the re-extraction job for a version."""
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT last_doc_id FROM reextraction_checkpoints WHERE target_version = ?',
+                (target_version,)
+            )
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            logging.error(f"Failed to read re-extraction checkpoint: {e}")
+            return 0
+        finally:
+            if conn:
+                conn.close()
+
+    def set_reextraction_checkpoint(self, target_version, last_doc_id):
+        """Record the last document id processed by the re-extraction job for a version."""
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO reextraction_checkpoints (target_version, last_doc_id, updated_timestamp)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+            ''', (target_version, last_doc_id))
+            conn.commit()
+            return True
+        except Exception as e:
+            logging.error(f"Failed to save re-extraction checkpoint: {e}")
+            return False
+        finally:
+            if conn:
+                conn.close()
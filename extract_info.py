@@ -1,6 +1,9 @@
 import json
 import os
 import logging
+import hashlib
+
+from vin_service import lookup_vin
 
 
 
@@ -16,12 +19,9 @@ except ImportError:
     HAS_OLLAMA = False
     logging.warning("ollama library not installed. Please install it with: pip install ollama")
 
-def get_llm_extraction(text):
-    if not HAS_OLLAMA:
-        return {"Error": "ollama library not found"}
+EXTRACTION_MODEL = 'llama3.2'
 
-    
-    prompt = f"""
+EXTRACTION_PROMPT = """
     You are an expert document extraction AI. Your task is to extract specific financial and vehicle details from the provided OCR text of a contract.
     Please extract the following fields exactly:
     1. APR (Annual Percentage Rate) - Look for "Annual Percentage Rate" or similar.
@@ -50,9 +50,24 @@ def get_llm_extraction(text):
     Document Text:
     {text}
     """
+
+# Stored alongside every extraction so rows produced by an older prompt, field
+# list or model can be found and re-extracted (see reextract.py). Any edit to
+# EXTRACTION_PROMPT or EXTRACTION_MODEL changes this value automatically.
+EXTRACTION_VERSION = hashlib.sha256(
+    (EXTRACTION_MODEL + EXTRACTION_PROMPT).encode("utf-8")
+).hexdigest()[:12]
+
+def get_llm_extraction(text):
+    if not HAS_OLLAMA:
+        return {"Error": "ollama library not found"}
+
+    
+    # replace() rather than format() so literal braces (e.g. a JSON example) can be added to the prompt
+    prompt = EXTRACTION_PROMPT.replace("{text}", text)
     
     try:
-        response = ollama.chat(model='llama3.2', messages=[
+        response = ollama.chat(model=EXTRACTION_MODEL, messages=[
             {'role': 'user', 'content': prompt},
         ], format='json')
         
@@ -74,4 +89,19 @@ def parse_ocr_text(ocr_data):
                     full_text += entry['text'] + " "
     return full_text
 
+def extract_document_fields(ocr_data):
+    """
+    Run the LLM extraction and VIN lookup stages on stored OCR data.
+    """
+    text_content = parse_ocr_text(ocr_data)
+    extracted_info = get_llm_extraction(text_content)
+    if not isinstance(extracted_info, dict):
+        return {"Error": f"LLM returned {type(extracted_info).__name__} instead of a JSON object"}
+
+    vin = extracted_info.get("VIN")
+    if isinstance(vin, str) and vin != "Not Found":
+        vin_details = lookup_vin(vin)
+        if vin_details:
+            extracted_info["vin_details"] = vin_details
 
+    return extracted_info
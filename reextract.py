@@ -0,0 +1,126 @@
+import argparse
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from db import DatabaseManager
+from extract_info import extract_document_fields, EXTRACTION_VERSION
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+class Throttle:
+    """Spaces out calls across worker threads so the backfill never exceeds a fixed rate."""
+
+    def __init__(self, max_per_second):
+        self.interval = 1.0 / max_per_second if max_per_second > 0 else 0
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def reextract_document(db, doc, throttle):
+    """
+    Re-run the LLM and VIN stages for one stored document, reusing its OCR data.
+
+    Returns:
+        bool: True if the document was updated to the current extraction version.
+    """
+    if not doc["ocr_data"]:
+        logging.warning(f"Document {doc['id']} has no OCR data, skipping")
+        return False
+
+    try:
+        throttle.wait()
+        extracted_info = extract_document_fields(doc["ocr_data"])
+        if "Error" in extracted_info:
+            # Leave the old extraction and version in place so a later run retries it
+            logging.error(f"Re-extraction failed for document {doc['id']}: {extracted_info['Error']}")
+            return False
+
+        return db.update_extraction(doc["id"], extracted_info, EXTRACTION_VERSION)
+    except Exception as e:
+        # One bad row must not stop the chunk, or the checkpoint would never advance past it
+        logging.error(f"Re-extraction failed for document {doc['id']}: {e}")
+        return False
+
+
+def run_reextraction(db, batch_size=50, workers=2, max_per_second=1.0, reset=False, limit=None):
+    """
+    Walk the documents table in id order and re-extract every row whose extraction_version
+    differs from EXTRACTION_VERSION. Progress is checkpointed after each chunk, so an
+    interrupted run resumes where it stopped.
+    """
+    if reset:
+        db.set_reextraction_checkpoint(EXTRACTION_VERSION, 0)
+    last_id = db.get_reextraction_checkpoint(EXTRACTION_VERSION)
+
+    pending = db.count_stale_documents(EXTRACTION_VERSION, last_id)
+    logging.info(
+        f"Re-extracting to version {EXTRACTION_VERSION}: {pending} stale documents after id {last_id}"
+    )
+
+    throttle = Throttle(max_per_second)
+    processed = updated = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while limit is None or processed < limit:
+            chunk_size = batch_size if limit is None else min(batch_size, limit - processed)
+            docs = db.get_stale_documents(EXTRACTION_VERSION, last_id, chunk_size)
+            if not docs:
+                break
+
+            results = executor.map(lambda doc: reextract_document(db, doc, throttle), docs)
+            updated += sum(1 for ok in results if ok)
+            processed += len(docs)
+
+            last_id = docs[-1]["id"]
+            db.set_reextraction_checkpoint(EXTRACTION_VERSION, last_id)
+            logging.info(f"Checkpoint at id {last_id}: {updated}/{processed} documents updated")
+
+    logging.info(f"Re-extraction finished: {updated} updated, {processed - updated} failed or skipped")
+    return {"processed": processed, "updated": updated, "last_id": last_id}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Re-run LLM extraction on stored documents whose extraction version is stale."
+    )
+    parser.add_argument("--db", default="document_extraction.db", help="Path to the SQLite database.")
+    parser.add_argument("--batch-size", type=int, default=50, help="Documents fetched per chunk.")
+    parser.add_argument("--workers", type=int, default=2, help="Parallel extraction workers.")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="Maximum LLM calls per second across all workers (0 = unthrottled).")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many documents.")
+    parser.add_argument("--reset", action="store_true",
+                        help="Ignore the saved checkpoint and rescan from the first document.")
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.rate < 0:
+        parser.error("--rate must not be negative")
+    if args.limit is not None and args.limit < 1:
+        parser.error("--limit must be at least 1")
+
+    run_reextraction(
+        DatabaseManager(args.db),
+        batch_size=args.batch_size,
+        workers=args.workers,
+        max_per_second=args.rate,
+        reset=args.reset,
+        limit=args.limit,
+    )
@@ -0,0 +1,150 @@
+import sqlite3
+import time
+
+import pytest
+
+import extract_info
+import reextract
+from db import DatabaseManager
+from extract_info import EXTRACTION_VERSION
+
+OCR_DATA = [{"lines": [{"text": "Annual Percentage Rate 5%"}]}]
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseManager(str(tmp_path / "documents.db"))
+
+
+def add_documents(db, count, extraction_version=None):
+    return [
+        db.insert_document(f"doc{i}.pdf", OCR_DATA, {"APR": "old"}, extraction_version)
+        for i in range(count)
+    ]
+
+
+def stub_extraction(monkeypatch, fn):
+    monkeypatch.setattr(reextract, "extract_document_fields", fn)
+
+
+def test_migrates_legacy_table(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE documents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            upload_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            ocr_data JSON,
+            extracted_data JSON
+        )
+    ''')
+    conn.execute("INSERT INTO documents (filename, ocr_data, extracted_data) VALUES ('a.pdf', '[]', '{}')")
+    conn.commit()
+    conn.close()
+
+    db = DatabaseManager(path)
+
+    assert db.get_document(1)["extraction_version"] is None
+    assert [doc["id"] for doc in db.get_stale_documents(EXTRACTION_VERSION)] == [1]
+
+
+def test_only_stale_documents_are_reextracted(db, monkeypatch):
+    stale_id, current_id = add_documents(db, 1)[0], add_documents(db, 1, EXTRACTION_VERSION)[0]
+    seen = []
+
+    def fake(ocr_data):
+        seen.append(ocr_data)
+        return {"APR": "new"}
+
+    stub_extraction(monkeypatch, fake)
+    result = reextract.run_reextraction(db, max_per_second=0)
+
+    assert result["updated"] == 1
+    assert seen == [OCR_DATA]
+    assert db.get_document(stale_id)["extraction_version"] == EXTRACTION_VERSION
+    assert db.get_document(current_id)["extracted_data"] == {"APR": "old"}
+
+
+def test_failing_document_does_not_stop_chunk(db, monkeypatch):
+    ids = add_documents(db, 3)
+    calls = []
+
+    def fake(ocr_data):
+        calls.append(ocr_data)
+        if len(calls) == 2:
+            raise TypeError("object of type 'int' has no len()")
+        return {"APR": "new"}
+
+    stub_extraction(monkeypatch, fake)
+    result = reextract.run_reextraction(db, batch_size=3, workers=1, max_per_second=0)
+
+    assert result == {"processed": 3, "updated": 2, "last_id": ids[-1]}
+    assert db.get_reextraction_checkpoint(EXTRACTION_VERSION) == ids[-1]
+    assert db.get_document(ids[1])["extraction_version"] is None
+    assert db.get_document(ids[2])["extraction_version"] == EXTRACTION_VERSION
+
+
+def test_non_string_vin_is_not_looked_up(monkeypatch):
+    monkeypatch.setattr(extract_info, "get_llm_extraction", lambda text: {"VIN": 12345})
+    monkeypatch.setattr(extract_info, "lookup_vin", lambda vin: pytest.fail("lookup_vin called"))
+
+    assert extract_info.extract_document_fields(OCR_DATA) == {"VIN": 12345}
+
+
+def test_non_dict_llm_reply_is_an_error(monkeypatch):
+    monkeypatch.setattr(extract_info, "get_llm_extraction", lambda text: ["not", "a", "dict"])
+
+    assert "Error" in extract_info.extract_document_fields(OCR_DATA)
+
+
+def test_resumes_after_interrupted_chunk(db, monkeypatch):
+    ids = add_documents(db, 5)
+    processed = []
+
+    def interrupted(ocr_data):
+        if len(processed) == 3:
+            raise KeyboardInterrupt
+        processed.append(len(processed))
+        return {"APR": "new"}
+
+    stub_extraction(monkeypatch, interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        reextract.run_reextraction(db, batch_size=2, workers=1, max_per_second=0)
+
+    # Only the first chunk completed; the partly done second chunk is not checkpointed
+    assert db.get_reextraction_checkpoint(EXTRACTION_VERSION) == ids[1]
+
+    stub_extraction(monkeypatch, lambda ocr_data: {"APR": "new"})
+    result = reextract.run_reextraction(db, batch_size=2, workers=1, max_per_second=0)
+
+    assert result == {"processed": 2, "updated": 2, "last_id": ids[-1]}
+    assert db.count_stale_documents(EXTRACTION_VERSION) == 0
+
+
+def test_reset_revisits_failed_documents(db, monkeypatch):
+    ids = add_documents(db, 2)
+    stub_extraction(monkeypatch, lambda ocr_data: {"Error": "llm down"})
+    reextract.run_reextraction(db, max_per_second=0)
+
+    stub_extraction(monkeypatch, lambda ocr_data: {"APR": "new"})
+    assert reextract.run_reextraction(db, max_per_second=0)["processed"] == 0
+    assert reextract.run_reextraction(db, max_per_second=0, reset=True)["updated"] == len(ids)
+
+
+def test_id_reset_clears_checkpoint(db):
+    doc_id = add_documents(db, 1)[0]
+    db.set_reextraction_checkpoint(EXTRACTION_VERSION, 500)
+
+    db.delete_document(doc_id)
+
+    assert db.get_reextraction_checkpoint(EXTRACTION_VERSION) == 0
+
+
+def test_throttle_spaces_calls():
+    throttle = reextract.Throttle(20)
+    start = time.monotonic()
+    for _ in range(4):
+        throttle.wait()
+
+    assert time.monotonic() - start >= 0.14